@@ -14,6 +14,16 @@ from google import genai
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web import WebClient
 from slack_sdk.web.slack_response import SlackResponse
+from scheduler import (
+    PROMPT_OVERHEAD_TOKENS,
+    SKIP_ERROR,
+    SKIP_MAX_THREADS,
+    SKIP_TIME_BUDGET,
+    SKIP_TOKEN_BUDGET,
+    budget_skip_reason,
+    estimate_thread_tokens,
+    rank_threads,
+)
 
 def safe_api_call(func, *args, **kwargs):
     while True:
@@ -153,6 +163,10 @@ def get_slack_thread_url(team_id, channel_id, thread_ts):
         print(f"Thread URL 생성(소수점 없음): ts={thread_ts}, url={slack_url}, team_id/name={team_id}")
         return slack_url
 
+class SummaryError(Exception):
+    """AI 모델 요약 생성 실패"""
+
+
 # OpenAI API를 사용한 요약 함수
 def summarize_with_openai(context, prompt):
     """OpenAI API를 사용하여 텍스트 요약"""
@@ -164,17 +178,17 @@ def summarize_with_openai(context, prompt):
         return res.choices[0].message.content
     except Exception as e:
         print(f"OpenAI API 오류: {str(e)}")
-        return f"OpenAI 요약 생성 중 오류가 발생했습니다: {str(e)}"
+        raise SummaryError(f"OpenAI 요약 생성 중 오류가 발생했습니다: {str(e)}") from e
 
 # Google Gemini API를 사용한 요약 함수
 def summarize_with_gemini(context, prompt):
     """Google Gemini API를 사용하여 텍스트 요약"""
+    # API 키 확인
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        raise SummaryError("GEMINI_API_KEY 환경변수가 설정되어 있지 않습니다.")
+
     try:
-        # API 키 확인
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-        if not gemini_api_key:
-            return "GEMINI_API_KEY 환경변수가 설정되어 있지 않습니다."
-            
         # Gemini 모델 설정
         client = genai.Client(api_key=gemini_api_key)
         
@@ -186,10 +200,10 @@ def summarize_with_gemini(context, prompt):
         return response.text
     except Exception as e:
         print(f"Gemini API 오류: {str(e)}")
-        return f"Gemini 요약 생성 중 오류가 발생했습니다: {str(e)}"
+        raise SummaryError(f"Gemini 요약 생성 중 오류가 발생했습니다: {str(e)}") from e
 
 def summarize_thread(thread_messages, user_map):
-    """스레드 메시지를 요약하는 함수"""
+    """스레드 메시지를 요약하는 함수 (요약 실패 시 SummaryError 발생)"""
     lines = []
     for m in thread_messages:
         # 사용자 ID를 이름으로 변환
@@ -271,6 +285,8 @@ if __name__ == "__main__":
             - 여러 채널을 동시에 선택할 수 있습니다.
             - 스레드 바로가기 링크를 통해 원본 내용을 확인할 수 있습니다.
             - 캐시 비우기 버튼으로 채널 정보를 새로고침할 수 있습니다.
+            - 스레드는 답글 수, 참여자 수, 최근 활동, 리액션 기준으로 중요한 순서대로 요약됩니다.
+            - 요약 예산(시간/토큰)을 설정하면 예산 내에서 처리하고 건너뛴 스레드를 알려줍니다.
             """)
         
         # 구분선 추가
@@ -328,7 +344,16 @@ if __name__ == "__main__":
         
         # 필터링 옵션 (간소화)
         case_sensitive = st.checkbox("대소문자 구분", value=False)
-    
+
+        # 요약 예산 설정 (우선순위 높은 스레드부터 예산 내에서 처리)
+        st.subheader("요약 예산")
+        time_budget = st.number_input(
+            "시간 예산 (초, 0이면 제한 없음)", min_value=0, max_value=3600, value=0, step=30
+        )
+        token_budget = st.number_input(
+            "토큰 예산 (추정치, 0이면 제한 없음)", min_value=0, max_value=1000000, value=0, step=1000
+        )
+
     # 메인 영역 - 채널 로드 및 필터링 결과 표시
     user_map = {}  # no preloading
 
@@ -563,7 +588,16 @@ if __name__ == "__main__":
             
             total_threads = 0
             empty_channels = []  # 스레드가 없는 채널을 추적하기 위한 리스트
-            
+            skipped_threads = []  # 개수 제한/예산/오류로 건너뛴 스레드 (채널명, 스레드, 사유)
+            candidates = []  # 요약 후보 스레드 (채널명, 채널ID, 스레드)
+            channel_containers = {}  # 채널명 -> 요약 카드를 표시할 container
+            channel_headers = {}  # 채널명 -> 채널 제목 placeholder
+            channel_counts = {}  # 채널명 -> 요약한 스레드 수
+            now_ts = time.time()
+            # 시간 예산은 채널 로드(1단계)부터 포함해서 계산
+            run_start = time.monotonic()
+
+            # 1단계: 모든 채널의 스레드를 모아 채널별 우선순위 정렬 및 최대 스레드 수 제한
             for name in selected_channels:
                 # 변경된 UI에 맞게 ID 가져오기 방식 변경
                 channel_id = selected_channel_ids.get(name)
@@ -573,79 +607,131 @@ if __name__ == "__main__":
 
                 with st.spinner(f"#{name} 채널의 스레드 로드 중..."):
                     try:
-                        response = client.conversations_history(channel=channel_id, oldest=since_ts)
+                        response = safe_api_call(client.conversations_history, channel=channel_id, oldest=since_ts)
                         messages = response["messages"]
                         threads = [m for m in messages if "thread_ts" in m and m["ts"] == m["thread_ts"]]
-                        
-                        if not threads:
-                            # 스레드가 없는 채널 이름만 리스트에 추가하고 계속 진행
-                            empty_channels.append(name)
-                            continue
-                            
-                        # 최대 스레드 수 제한
-                        threads = threads[:max_threads]
-                        total_threads += len(threads)
-                        
-                        # 채널 제목
-                        st.markdown(f"### {name} ({len(threads)}개 스레드)")
-                        
-                        # 상태 표시를 위한 placeholder 사용
-                        status_placeholder = st.empty()
-
-                        # 각 스레드를 카드 형태로 표시
-                        for i, t in enumerate(threads):
-                            # 기존 spinner 대신 상태 텍스트만 업데이트
-                            status_placeholder.text(f"스레드 {i+1}/{len(threads)} 처리 중...")
-                            
-                            thread_ts = t["ts"]
-                            thread_messages = fetch_thread_replies(channel_id, thread_ts)
-                            summary = summarize_thread(thread_messages, user_map)
-                            
-                            # 타임스탬프를 보기 좋게 변환
-                            dt_obj = datetime.fromtimestamp(float(thread_ts), tz=KST)
-                            formatted_time = dt_obj.strftime("%Y-%m-%d %H:%M")
-                            
-                            # 스레드 URL 생성 - 항상 team_name 사용
-                            team_name = getattr(st.session_state, 'team_name', '')
-                            team_id = getattr(st.session_state, 'team_id', 'T0123456')
-                            
-                            # team_name이 있으면 사용, 없으면 기본값(workspace) 사용
-                            if not team_name:
-                                team_name = "workspace"
-                                
-                            thread_url = get_slack_thread_url(team_name, channel_id, thread_ts)
-                            
-                            # 디버깅 정보 표시
-                            print(f"Thread 정보: team_id={team_id}, team_name={team_name}, channel_id={channel_id}, ts={thread_ts}")
-                            
-                            # HTML 이스케이프 적용하여 코드가 실행되지 않도록 함
-                            import html
-                            escaped_summary = html.escape(summary)
-                            
-                            # 심플한 카드 스타일로 표시
-                            st.markdown(f"""
-                            <div style="border: 1px solid #e6e6e6; padding: 15px; border-radius: 5px; margin-bottom: 15px; background-color: #f9f9f9;">
-                                <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
-                                    <span><strong>🕒 {formatted_time}</strong></span>
-                                    <span><a href="{thread_url}" target="_blank" rel="noopener noreferrer" class="slack-link">스레드 바로가기 🔗</a></span>
-                                </div>
-                                <div style="padding: 15px; background-color: white; border-radius: 4px; margin-bottom: 10px; font-size: 16px; color: #333; line-height: 1.5;">
-                                    {escaped_summary}
-                                </div>
-                                <div style="font-size: 12px; color: #666; text-align: right;">
-                                    메시지 {len(thread_messages)}개
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        # 모든 스레드 처리 완료 후 상태 표시 제거
-                        status_placeholder.empty()
-                        
                     except Exception as e:
                         st.error(f"#{name} 채널 처리 중 오류 발생: {str(e)}")
-            
+                        continue
+
+                if not threads:
+                    # 스레드가 없는 채널 이름만 리스트에 추가하고 계속 진행
+                    empty_channels.append(name)
+                    continue
+
+                # 채널별 결과 영역을 선택 순서대로 미리 만들어 두고, 요약이 끝나는 대로 카드 추가
+                channel_containers[name] = st.container()
+                channel_headers[name] = channel_containers[name].empty()
+
+                threads = rank_threads(threads, now_ts)
+                for t in threads[max_threads:]:
+                    skipped_threads.append((name, t, SKIP_MAX_THREADS))
+                candidates.extend((name, channel_id, t) for t in threads[:max_threads])
+
+            # 2단계: 전체 채널의 후보를 우선순위 순으로 예산 내에서 요약
+            candidates = rank_threads(candidates, now_ts, key=lambda c: c[2])
+            tokens_used = 0
+            processed_count = 0
+
+            # 스레드 URL 생성 - 항상 team_name 사용
+            team_name = getattr(st.session_state, 'team_name', '')
+            team_id = getattr(st.session_state, 'team_id', 'T0123456')
+
+            # team_name이 있으면 사용, 없으면 기본값(workspace) 사용
+            if not team_name:
+                team_name = "workspace"
+
+            # HTML 이스케이프 적용하여 코드가 실행되지 않도록 함
+            import html
+
+            # 상태 표시를 위한 placeholder 사용
+            status_placeholder = st.empty()
+
+            for i, (name, channel_id, t) in enumerate(candidates):
+                # 내용을 가져오기 전에 최소 비용만으로 예산을 넘는지 확인 (불필요한 API 호출 방지)
+                reason = budget_skip_reason(
+                    time.monotonic() - run_start, processed_count, tokens_used,
+                    PROMPT_OVERHEAD_TOKENS, time_budget, token_budget
+                )
+                if reason:
+                    skipped_threads.append((name, t, reason))
+                    continue
+
+                status_placeholder.text(f"스레드 {i+1}/{len(candidates)} 처리 중... (#{name})")
+
+                try:
+                    thread_messages = safe_api_call(fetch_thread_replies, channel_id, t["ts"])
+
+                    # 토큰 예산을 넘는 스레드는 건너뛰고, 더 작은 스레드는 계속 시도
+                    # (시간 예산은 가져오기 전에 이미 확인했으므로 여기서는 토큰만 확인)
+                    estimated_tokens = estimate_thread_tokens(thread_messages)
+                    reason = budget_skip_reason(
+                        time.monotonic() - run_start, processed_count, tokens_used,
+                        estimated_tokens, time_budget=0, token_budget=token_budget
+                    )
+                    if reason:
+                        skipped_threads.append((name, t, reason))
+                        continue
+
+                    summary = summarize_thread(thread_messages, user_map)
+                except Exception as e:
+                    print(f"#{name} 스레드 {t['ts']} 처리 중 오류: {e}")
+                    skipped_threads.append((name, t, f"{SKIP_ERROR} ({e})"))
+                    continue
+
+                tokens_used += estimated_tokens
+                processed_count += 1
+                total_threads += 1
+                channel_counts[name] = channel_counts.get(name, 0) + 1
+
+                thread_ts = t["ts"]
+
+                # 타임스탬프를 보기 좋게 변환
+                dt_obj = datetime.fromtimestamp(float(thread_ts), tz=KST)
+                formatted_time = dt_obj.strftime("%Y-%m-%d %H:%M")
+
+                thread_url = get_slack_thread_url(team_name, channel_id, thread_ts)
+
+                # 디버깅 정보 표시
+                print(f"Thread 정보: team_id={team_id}, team_name={team_name}, channel_id={channel_id}, ts={thread_ts}")
+
+                escaped_summary = html.escape(summary)
+
+                # 채널 제목은 실제 요약한 스레드 수로 갱신
+                channel_headers[name].markdown(f"### {name} ({channel_counts[name]}개 스레드)")
+
+                # 심플한 카드 스타일로 해당 채널 영역에 바로 표시
+                channel_containers[name].markdown(f"""
+                <div style="border: 1px solid #e6e6e6; padding: 15px; border-radius: 5px; margin-bottom: 15px; background-color: #f9f9f9;">
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
+                        <span><strong>🕒 {formatted_time}</strong></span>
+                        <span><a href="{thread_url}" target="_blank" rel="noopener noreferrer" class="slack-link">스레드 바로가기 🔗</a></span>
+                    </div>
+                    <div style="padding: 15px; background-color: white; border-radius: 4px; margin-bottom: 10px; font-size: 16px; color: #333; line-height: 1.5;">
+                        {escaped_summary}
+                    </div>
+                    <div style="font-size: 12px; color: #666; text-align: right;">
+                        메시지 {len(thread_messages)}개
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            # 모든 스레드 처리 완료 후 상태 표시 제거
+            status_placeholder.empty()
+
+            # 건너뛴 스레드 보고
+            if skipped_threads:
+                with st.expander(f"⏭️ 건너뛴 스레드 {len(skipped_threads)}개", expanded=False):
+                    for ch_name, t, reason in skipped_threads:
+                        skipped_time = datetime.fromtimestamp(float(t["ts"]), tz=KST).strftime("%Y-%m-%d %H:%M")
+                        skipped_url = get_slack_thread_url(team_name, selected_channel_ids[ch_name], t["ts"])
+                        st.markdown(
+                            f"- #{ch_name} · {skipped_time} · 답글 {t.get('reply_count', 0)}개 · "
+                            f"{reason} · [스레드 바로가기]({skipped_url})"
+                        )
+
             # 요약 결과 표시 - 중복 메시지 방지
-            if total_threads == 0:
+            if total_threads == 0 and not skipped_threads:
                 # 모든 채널에 스레드가 없는 경우에만 전체 메시지 표시
                 st.warning("선택한 채널에서 요약할 스레드를 찾지 못했습니다.")
             else:
@@ -653,8 +739,16 @@ if __name__ == "__main__":
                 if empty_channels:
                     channels_str = ", ".join([f"#{ch}" for ch in empty_channels])
                     st.info(f"다음 채널에서는 스레드를 찾을 수 없었습니다: {channels_str}")
-                
-                # 전체 요약 결과 표시
-                st.success(f"총 {total_threads}개 스레드 요약 완료!")
+
+                if total_threads == 0:
+                    # 실제 건너뛴 사유에 맞춰 안내
+                    reasons = {SKIP_ERROR if r.startswith(SKIP_ERROR) else r for _, _, r in skipped_threads}
+                    message = f"요약한 스레드가 없습니다. 건너뛴 사유: {', '.join(sorted(reasons))}"
+                    if reasons & {SKIP_TIME_BUDGET, SKIP_TOKEN_BUDGET}:
+                        message += " — 요약 예산을 늘려보세요."
+                    st.warning(message)
+                else:
+                    # 전체 요약 결과 표시
+                    st.success(f"총 {total_threads}개 스레드 요약 완료!")
     else:
         st.warning("표시할 채널이 없습니다. 필터링 조건을 변경해보세요.")
\ No newline at end of file
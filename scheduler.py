@@ -0,0 +1,82 @@
+import math
+import time
+
+# 건너뛴 스레드 사유
+SKIP_MAX_THREADS = "최대 스레드 수 초과"
+SKIP_TIME_BUDGET = "시간 예산 초과"
+SKIP_TOKEN_BUDGET = "토큰 예산 초과"
+SKIP_ERROR = "처리 오류"
+
+# 요약 프롬프트 고정 부분의 토큰 여유분 (스레드 하나당 최소 토큰 수)
+PROMPT_OVERHEAD_TOKENS = 200
+
+# 우선순위 가중치
+# - 답글 수/참여자 수/리액션은 log1p 스케일이라 값이 2배가 될 때마다 일정량만 늘어남
+#   (답글 40개 스레드가 다른 신호를 압도하지 않도록)
+# - 최신성은 0~1 범위이고, 가중치 8은 답글 약 50개(2 * log1p(50) ≈ 7.9)와 비슷한 무게
+# - 참여자 수는 여러 사람이 관여한 논의일수록 중요하다고 보고 답글 수보다 높게 둠
+REPLY_WEIGHT = 2.0
+REPLY_USERS_WEIGHT = 3.0
+REACTION_WEIGHT = 1.5
+RECENCY_WEIGHT = 8.0
+# 마지막 활동 후 이 시간이 지나면 최신성 점수가 절반이 됨
+RECENCY_HALF_LIFE_HOURS = 24
+
+
+def thread_priority(thread, now_ts=None):
+    """스레드 페이로드의 신호(답글 수, 참여자 수, 최근 답글 시각, 리액션)로 우선순위 점수를 계산"""
+    if now_ts is None:
+        now_ts = time.time()
+
+    reply_count = thread.get("reply_count") or 0
+    reply_users_count = thread.get("reply_users_count") or 0
+    reaction_count = sum(r.get("count", 0) for r in thread.get("reactions") or [])
+
+    # 최근 답글이 없으면 스레드 시작 시각 기준으로 최신성 계산
+    latest_ts = float(thread.get("latest_reply") or thread.get("ts") or 0)
+    hours_since = max(now_ts - latest_ts, 0) / 3600
+    recency = RECENCY_HALF_LIFE_HOURS / (RECENCY_HALF_LIFE_HOURS + hours_since)
+
+    return (math.log1p(reply_count) * REPLY_WEIGHT
+            + math.log1p(reply_users_count) * REPLY_USERS_WEIGHT
+            + math.log1p(reaction_count) * REACTION_WEIGHT
+            + recency * RECENCY_WEIGHT)
+
+
+def rank_threads(threads, now_ts=None, key=None):
+    """우선순위가 높은 스레드부터 정렬 (동점이면 최근 스레드 우선)
+
+    key를 주면 각 항목에서 스레드 페이로드를 꺼내는 함수로 사용 (예: (채널명, 채널ID, 스레드) 튜플)
+    """
+    if now_ts is None:
+        now_ts = time.time()
+    if key is None:
+        key = lambda item: item
+
+    def sort_key(item):
+        t = key(item)
+        return thread_priority(t, now_ts), float(t.get("ts") or 0)
+
+    return sorted(threads, key=sort_key, reverse=True)
+
+
+def estimate_thread_tokens(thread_messages):
+    """요약 프롬프트에 들어갈 토큰 수를 대략 추정 (한글 기준 약 2자당 1토큰 + 프롬프트 여유분)"""
+    chars = sum(len(m.get("text") or "") for m in thread_messages)
+    return chars // 2 + PROMPT_OVERHEAD_TOKENS
+
+
+def budget_skip_reason(elapsed, processed_count, tokens_used, estimated_tokens,
+                       time_budget=0, token_budget=0):
+    """예산을 넘으면 건너뛸 사유를, 처리 가능하면 None을 반환 (예산 0은 제한 없음)
+
+    스레드 내용을 가져오기 전에는 estimated_tokens에 PROMPT_OVERHEAD_TOKENS를 넘겨
+    최소 비용만으로도 예산을 넘는 스레드를 API 호출 없이 걸러낸다.
+    """
+    # 남은 시간이 스레드 하나의 평균 처리 시간보다 적으면 건너뛰기
+    avg_thread_time = elapsed / processed_count if processed_count else 0
+    if time_budget and elapsed + avg_thread_time > time_budget:
+        return SKIP_TIME_BUDGET
+    if token_budget and tokens_used + estimated_tokens > token_budget:
+        return SKIP_TOKEN_BUDGET
+    return None
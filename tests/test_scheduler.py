@@ -0,0 +1,75 @@
+from scheduler import (
+    PROMPT_OVERHEAD_TOKENS,
+    SKIP_TIME_BUDGET,
+    SKIP_TOKEN_BUDGET,
+    budget_skip_reason,
+    estimate_thread_tokens,
+    rank_threads,
+    thread_priority,
+)
+
+NOW = 1_700_000_000.0
+DAY = 24 * 3600
+
+
+def test_recent_reacted_thread_outranks_old_busy_thread():
+    old_busy = {"ts": str(NOW - 30 * DAY), "latest_reply": str(NOW - 30 * DAY),
+                "reply_count": 40, "reply_users_count": 2}
+    recent = {"ts": str(NOW - 30), "latest_reply": str(NOW - 30),
+              "reply_count": 1, "reply_users_count": 1, "reactions": [{"count": 10}]}
+    assert thread_priority(recent, NOW) > thread_priority(old_busy, NOW)
+    assert rank_threads([old_busy, recent], NOW) == [recent, old_busy]
+
+
+def test_more_participants_rank_higher_at_same_time():
+    quiet = {"ts": str(NOW - DAY), "reply_count": 3, "reply_users_count": 1}
+    busy = {"ts": str(NOW - DAY), "reply_count": 3, "reply_users_count": 3}
+    assert rank_threads([quiet, busy], NOW) == [busy, quiet]
+
+
+def test_ties_prefer_newer_thread():
+    older = {"ts": "100.0", "latest_reply": str(NOW)}
+    newer = {"ts": "200.0", "latest_reply": str(NOW)}
+    assert rank_threads([older, newer], NOW) == [newer, older]
+
+
+def test_latest_reply_falls_back_to_ts():
+    without_reply = {"ts": str(NOW - DAY)}
+    with_reply = {"ts": "0", "latest_reply": str(NOW - DAY)}
+    assert thread_priority(without_reply, NOW) == thread_priority(with_reply, NOW)
+
+
+def test_missing_or_none_reactions():
+    base = {"ts": str(NOW)}
+    assert thread_priority(base, NOW) == thread_priority({**base, "reactions": None}, NOW)
+    assert thread_priority(base, NOW) == thread_priority({**base, "reactions": []}, NOW)
+    assert thread_priority({**base, "reply_count": None}, NOW) == thread_priority(base, NOW)
+
+
+def test_rank_threads_with_key():
+    low = ("general", "C1", {"ts": "1.0"})
+    high = ("random", "C2", {"ts": "2.0", "reply_count": 5, "latest_reply": str(NOW)})
+    assert rank_threads([low, high], NOW, key=lambda c: c[2]) == [high, low]
+
+
+def test_estimate_thread_tokens():
+    assert estimate_thread_tokens([]) == PROMPT_OVERHEAD_TOKENS
+    assert estimate_thread_tokens([{"text": "abcd"}, {"text": None}, {}]) == PROMPT_OVERHEAD_TOKENS + 2
+
+
+def test_budget_skip_reason_unlimited():
+    assert budget_skip_reason(1e6, 10, 1e9, 1e9) is None
+
+
+def test_budget_skip_reason_time():
+    # 평균 10초짜리 스레드가 남은 5초 안에 끝나지 않으므로 건너뜀
+    assert budget_skip_reason(55, 5, 0, 0, time_budget=60) == SKIP_TIME_BUDGET
+    assert budget_skip_reason(45, 5, 0, 0, time_budget=60) is None
+    assert budget_skip_reason(0, 0, 0, 0, time_budget=60) is None
+
+
+def test_budget_skip_reason_tokens():
+    assert budget_skip_reason(0, 0, 900, 200, token_budget=1000) == SKIP_TOKEN_BUDGET
+    assert budget_skip_reason(0, 0, 800, 200, token_budget=1000) is None
+    # 내용을 가져오기 전 최소 비용만으로도 예산을 넘으면 건너뜀
+    assert budget_skip_reason(0, 0, 850, PROMPT_OVERHEAD_TOKENS, token_budget=1000) == SKIP_TOKEN_BUDGET